@@ -1,39 +1,124 @@
+import os
 import re
-import shutil
+import sys
 import csv
+import mmap
+import shutil
+import hashlib
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, Optional, List, Tuple
+from typing import Dict, Iterable, Optional, List, Tuple
 from datetime import datetime
 
 
+# Precompiled patterns and literals for club name normalization and filename parsing
+_PREFIX_RE = re.compile(r'^(CFF|In-Shape):\s*', re.IGNORECASE)
+_CA_ZIP_RE = re.compile(r'\s+(?:california|ca)\s+\d+')
+_SEPARATOR_TRANS = str.maketrans('_-', '  ')
+_TXT_PREFIXES = ('CFF__', 'In-Shape__')
+_MD_CA_RE = re.compile(r'-(?:california|ca)-\d+')
+
+# Pricing content block in a club TXT file: "Member Type:" through the end of the file
+_TXT_PRICING_RE = re.compile(r'Member Type:.*?(?=\n\s*$|\Z)', re.DOTALL)
+
+# Pricing content block in a markdown file:
+# Starts with "Member Type:" and ends with the last known closing line
+# Handles: Elevate Offering (standard), Insurance Availability, or SILVER SNEAKERS
+_MD_PRICING_START = 'Member Type:'
+_MD_PRICING_CLOSING_LABELS = ('Elevate Offering:', 'Insurance Availability:', 'SILVER SNEAKERS:')
+_MD_PRICING_TERMINATORS = ('\n\n', '\n[Get Started]')
+
+# Patterns for locating and bounding the Annual Enhancement Fee text
+# The fee anchor is found case-insensitively with a plain find over an ASCII-folded copy
+# of the text, several times faster than an IGNORECASE regex. This is exact: the anchor is
+# ASCII and none of its letters has a non-ASCII case variant.
+_FEE_ANCHOR = b'annual enhancement fee'
+_FEE_APPLIES_RE = re.compile(r'an annual enhancement fee applies', re.IGNORECASE)
+_CLICK_RE = re.compile(r'\[Click\s+here[^\]]*?\]\([^\)]+\)', re.IGNORECASE)
+_TERMS_RE = re.compile(r'Other\s+terms\s+and\s+conditions\s+apply[^.]*?\.?\s*(?:\[Click\s+here[^\]]*?\]\([^\)]+\))?', re.IGNORECASE)
+_TERMS_OR_CLICK_RE = re.compile(_TERMS_RE.pattern + '|' + _CLICK_RE.pattern, re.IGNORECASE)
+_SECTION_END_RE = re.compile(r'\s+Other\s+terms\s+and\s+conditions\s+apply|\[Click\s+here|\n\n#', re.IGNORECASE)
+_ADDITIONAL_FEES_RE = re.compile(r'(\*\*Additional\s+Fees?:\*\*\s*)$', re.MULTILINE | re.IGNORECASE)
+_SENTENCE_END_RE = re.compile(r'(.*?\.\s*(?:\n|$))', re.DOTALL)
+_TWO_SENTENCES_END_RE = re.compile(r'(.*?\.\s+.*?\.\s*(?:\n|$))', re.DOTALL)
+
+# New standardized enhancement fee text
+_NEW_ENHANCEMENT_FEE_TEXT = """*Annual enhancement fee of $49.95 for the first member and $89.95 for all memberships with two or more persons will be billed 60 days from the join date, then every 12 months thereafter for the duration of the membership. If you choose to use a credit or debit card for your method of payment, additional $4.99 credit card fee added to your dues.
+
+*Amenities and programming vary by location. Monthly retail rebate valid on in-club purchases of drinks, snacks and shakes and excludes day passes and discounted items. Rebate not to exceed monthly dues amount. Relax & Recover available at select clubs. For guest passes, guest must be 18+ and accompany a member. One guest per visit. All access pass is one time per month and expires at the end of the month.
+
+*Reservations are required. A $2 no-show fee will be applied if reservations are not cancelled 2 hours prior."""
+
+# First line written to fully updated markdown files; carries a digest of the pricing
+# content (and fee text) so reruns can skip files that would come out the same
+_SENTINEL_PREFIX = '<!-- isf-pricing-updated: '
+_SENTINEL_SUFFIX = ' -->\n'
+
+# Pricing CSV column indices (0-based)
+_ADD_ON_FEES_COL = 6  # "Add On Fees" column
+_LOCAL_NETWORK_COL = 15  # "Basic Local Network"
+_FITNESS_PLUS_COL = 16  # "Fitness Plus Local Network"
+_LIFESTYLE_COL = 17  # "Lifestyle Local Network"
+
+# Header labels marking the last standard pricing column; later columns are reported as extras
+_LIFESTYLE_HEADER_LABELS = ('Lifestyle Local Network', 'Lifestyle Network Plus')
+
+# Cell values meaning "no price" in an additional column
+_EMPTY_MARKERS = frozenset({'', '-', '$-'})
+
+# Stripped pricing values of one CSV row; extras follow the order of additional_columns
+FeeRow = namedtuple('FeeRow', 'fee_type local fitness lifestyle extras')
+
+
+def _log(log: Optional[List[str]], message: str) -> None:
+    """Append message to log if one is given, otherwise print it."""
+    if log is None:
+        print(message)
+    else:
+        log.append(message)
+
+
+def _write_log(log: List[str]) -> None:
+    """Emit buffered log lines to stdout with a single write."""
+    if log:
+        sys.stdout.write("\n".join(log) + "\n")
+
+
+@lru_cache(maxsize=4096)
 def normalize_club_name(name: str) -> str:
     """
     Normalize club name for matching.
     Removes special characters, converts to lowercase, handles spaces/underscores.
     """
     # Remove prefixes like "CFF:", "In-Shape:", etc.
-    name = re.sub(r'^(CFF|In-Shape):\s*', '', name, flags=re.IGNORECASE)
+    name = _PREFIX_RE.sub('', name)
     
     # Convert to lowercase and replace underscores/hyphens with spaces
-    name = name.lower().replace('_', ' ').replace('-', ' ')
+    name = name.lower().translate(_SEPARATOR_TRANS)
     
     # Remove state names and zip codes (e.g., "california 95355")
-    name = re.sub(r'\s+california\s+\d+', '', name)
-    name = re.sub(r'\s+ca\s+\d+', '', name)
+    name = _CA_ZIP_RE.sub('', name)
     
     # Normalize multiple spaces to single space
-    name = re.sub(r'\s+', ' ', name).strip()
+    name = ' '.join(name.split())
     
     return name
 
 
+@lru_cache(maxsize=4096)
 def extract_club_name_from_txt(filepath: Path) -> str:
     """Extract club name from text file name."""
     # Get filename without extension
     filename = filepath.stem
     
     # Remove prefix (CFF__ or In-Shape__)
-    club_name = re.sub(r'^(CFF__|In-Shape__)', '', filename)
+    club_name = filename
+    for prefix in _TXT_PREFIXES:
+        if club_name.startswith(prefix):
+            club_name = club_name[len(prefix):]
+            break
     
     # Replace underscores with spaces
     club_name = club_name.replace('_', ' ')
@@ -41,18 +126,17 @@ def extract_club_name_from_txt(filepath: Path) -> str:
     return club_name
 
 
+@lru_cache(maxsize=4096)
 def extract_club_name_from_md(filepath: Path) -> str:
     """Extract club name from markdown file name."""
     # Get filename without extension
     filename = filepath.stem
     
     # Remove prefix and suffix
-    filename = re.sub(r'^www\.inshape\.com_gyms_', '', filename)
-    filename = re.sub(r'_clean$', '', filename)
+    filename = filename.removeprefix('www.inshape.com_gyms_').removesuffix('_clean')
     
     # Remove state and zip code patterns
-    filename = re.sub(r'-california-\d+', '', filename)
-    filename = re.sub(r'-ca-\d+', '', filename)
+    filename = _MD_CA_RE.sub('', filename)
     
     # Replace hyphens and underscores with spaces
     filename = filename.replace('-', ' ').replace('_', ' ')
@@ -60,11 +144,13 @@ def extract_club_name_from_md(filepath: Path) -> str:
     return filename
 
 
-def read_pricing_content_from_csv(csv_filepath: Path, club_name: str) -> Optional[Tuple[str, List[str]]]:
+def load_csv_index(csv_filepath: Path,
+                   log: Optional[List[str]] = None) -> Optional[Tuple[List[Tuple[int, str]], Dict[str, List[FeeRow]]]]:
     """
-    Read pricing content from CSV file and check for additional columns after Lifestyle Network Plus.
-    Returns tuple of (pricing_content, additional_columns_data) where additional_columns_data is a list
-    of column names and values if additional columns exist, empty list otherwise.
+    Read the pricing CSV once and index its rows by normalized club name.
+    Returns tuple of (additional_columns, index) where additional_columns is a list of
+    (column_index, column_name) for the columns after Lifestyle Network Plus, and index
+    maps each normalized club name to the FeeRow of each of its CSV rows.
     """
     try:
         with open(csv_filepath, 'r', encoding='utf-8') as f:
@@ -72,14 +158,14 @@ def read_pricing_content_from_csv(csv_filepath: Path, club_name: str) -> Optiona
             header = next(reader)  # Read header row
             
             # Find the index of "Lifestyle Local Network" column (column 17, 0-based index)
-            lifestyle_col_idx = None
-            for idx, col_name in enumerate(header):
-                if 'Lifestyle Local Network' in col_name or 'Lifestyle Network Plus' in col_name:
-                    lifestyle_col_idx = idx
-                    break
+            lifestyle_col_idx = next(
+                (idx for idx, col_name in enumerate(header)
+                 if any(label in col_name for label in _LIFESTYLE_HEADER_LABELS)),
+                None
+            )
             
             if lifestyle_col_idx is None:
-                print(f"  [!] Could not find Lifestyle Network Plus column in CSV")
+                _log(log, f"  [!] Could not find Lifestyle Network Plus column in CSV")
                 return None
             
             # Check if there are columns after Lifestyle Network Plus
@@ -91,359 +177,470 @@ def read_pricing_content_from_csv(csv_filepath: Path, club_name: str) -> Optiona
                     if col_name:  # Only include non-empty column names
                         additional_columns.append((idx, col_name))
             
-            # Normalize club name for matching (remove prefixes like "CFF:", "In-Shape:")
-            normalized_club_name = normalize_club_name(club_name)
-            
-            # Read all rows for this club
-            club_rows = []
+            # Group rows by normalized club name (removes prefixes like "CFF:", "In-Shape:"),
+            # stripping the pricing cells once here instead of on every lookup. Cells repeat
+            # heavily (fee types, "$-", common prices), so they are interned to share one object
+            intern = sys.intern
+            index = {}
             for row in reader:
                 if len(row) > 1:
-                    csv_club_name = row[1].strip()
-                    normalized_csv_name = normalize_club_name(csv_club_name)
-                    # Match if normalized names match
-                    if normalized_club_name == normalized_csv_name:
-                        club_rows.append(row)
-            
-            if not club_rows:
-                print(f"  [!] Could not find club '{club_name}' in CSV")
-                return None
-            
-            # Build pricing content (similar to text file format)
-            pricing_lines = []
-            fee_types = [
-                "Member Type", "Enrollment 12 M", "Main Dues 12M", "Enrollment MTM",
-                "Main Dues MTM", "Add Adult", "Add Youth", "Add Child",
-                "Preferred", "Elevate", "Non-EFT Fee", "Credit Card Service Fee"
-            ]
-            
-            # Column indices (0-based)
-            add_on_fees_col = 6  # "Add On Fees" column
-            local_network_col = 15  # "Basic Local Network"
-            fitness_plus_col = 16  # "Fitness Plus Local Network"
-            lifestyle_col = 17  # "Lifestyle Local Network"
-            
-            for fee_type in fee_types:
-                # Find row for this fee type
-                fee_row = None
-                for row in club_rows:
-                    if len(row) > add_on_fees_col and row[add_on_fees_col].strip() == fee_type:
-                        fee_row = row
-                        break
-                
-                if fee_row:
-                    # Extract values
-                    local_val = fee_row[local_network_col].strip() if len(fee_row) > local_network_col else ""
-                    fitness_val = fee_row[fitness_plus_col].strip() if len(fee_row) > fitness_plus_col else ""
-                    lifestyle_val = fee_row[lifestyle_col].strip() if len(fee_row) > lifestyle_col else ""
-                    
-                    # Format the line
-                    pricing_line = f"{fee_type}: Local Network: {local_val or 'Not available'} | Fitness Plus Local Network: {fitness_val or 'Not available'} | Lifestyle Network Plus: {lifestyle_val or 'Not available'}"
-                    
-                    # Add additional columns if they exist and have values
-                    if additional_columns:
-                        additional_parts = []
-                        for col_idx, col_name in additional_columns:
-                            if len(fee_row) > col_idx:
-                                col_value = fee_row[col_idx].strip()
-                                # Only include if value exists and is not empty
-                                if col_value and col_value not in ["", "-", "$-", "$-"]:
-                                    # Clean column name for display
-                                    clean_col_name = col_name.replace(' - NFC', '').strip()
-                                    additional_parts.append(f"{clean_col_name}: {col_value}")
-                        
-                        if additional_parts:
-                            pricing_line += " | " + " | ".join(additional_parts)
-                    
-                    pricing_lines.append(pricing_line)
+                    club_rows = index.setdefault(intern(normalize_club_name(row[1].strip())), [])
+                    row_len = len(row)
+                    if row_len > _ADD_ON_FEES_COL:
+                        club_rows.append(FeeRow(
+                            intern(row[_ADD_ON_FEES_COL].strip()),
+                            intern(row[_LOCAL_NETWORK_COL].strip()) if row_len > _LOCAL_NETWORK_COL else "",
+                            intern(row[_FITNESS_PLUS_COL].strip()) if row_len > _FITNESS_PLUS_COL else "",
+                            intern(row[_LIFESTYLE_COL].strip()) if row_len > _LIFESTYLE_COL else "",
+                            tuple(intern(row[col_idx].strip()) if row_len > col_idx else ""
+                                  for col_idx, _ in additional_columns),
+                        ))
             
-            pricing_content = "\n".join(pricing_lines)
-            
-            # Return pricing content and list of additional column names
-            additional_col_names = [col_name for _, col_name in additional_columns] if additional_columns else []
-            return (pricing_content, additional_col_names)
-        
-        return None
+            return (additional_columns, index)
     except Exception as e:
-        print(f"Error reading CSV {csv_filepath}: {e}")
+        _log(log, f"Error reading CSV {csv_filepath}: {e}")
         import traceback
         traceback.print_exc()
         return None
 
 
-def read_pricing_content_from_txt(filepath: Path) -> Optional[str]:
+def build_pricing_lines(club_name: str, additional_columns: List[Tuple[int, str]],
+                        index: Dict[str, List[FeeRow]],
+                        log: Optional[List[str]] = None) -> Optional[Tuple[str, List[str]]]:
+    """
+    Build pricing content for a club from the CSV index returned by load_csv_index.
+    Returns tuple of (pricing_content, additional_columns_data) where additional_columns_data is a list
+    of column names if additional columns exist, empty list otherwise.
+    """
+    # Normalize club name for matching (remove prefixes like "CFF:", "In-Shape:")
+    club_rows = index.get(normalize_club_name(club_name))
+    
+    if club_rows is None:
+        _log(log, f"  [!] Could not find club '{club_name}' in CSV")
+        return None
+    
+    # Build pricing content (similar to text file format)
+    pricing_lines = []
+    fee_types = [
+        "Member Type", "Enrollment 12 M", "Main Dues 12M", "Enrollment MTM",
+        "Main Dues MTM", "Add Adult", "Add Youth", "Add Child",
+        "Preferred", "Elevate", "Non-EFT Fee", "Credit Card Service Fee"
+    ]
+    
+    # Index rows by fee type (first row wins, as with a linear scan)
+    fee_index = {}
+    for fee_row in club_rows:
+        fee_index.setdefault(fee_row.fee_type, fee_row)
+    
+    # Column names as displayed (cleaned once per club rather than per row)
+    display_names = [col_name.replace(' - NFC', '').strip() for _, col_name in additional_columns]
+    
+    for fee_type in fee_types:
+        fee_row = fee_index.get(fee_type)
+        
+        if fee_row:
+            # Format the line from its parts and join once
+            parts = [
+                fee_type, ": Local Network: ", fee_row.local or 'Not available',
+                " | Fitness Plus Local Network: ", fee_row.fitness or 'Not available',
+                " | Lifestyle Network Plus: ", fee_row.lifestyle or 'Not available',
+            ]
+            
+            # Add additional columns if they exist and have values
+            for display_name, col_value in zip(display_names, fee_row.extras):
+                # Only include if value exists and is not empty
+                if col_value and col_value not in _EMPTY_MARKERS:
+                    parts.extend((" | ", display_name, ": ", col_value))
+            
+            pricing_lines.append("".join(parts))
+    
+    pricing_content = "\n".join(pricing_lines)
+    
+    # Return pricing content and list of additional column names
+    additional_col_names = [col_name for _, col_name in additional_columns] if additional_columns else []
+    return (pricing_content, additional_col_names)
+
+
+def extract_pricing_content(content: str) -> Optional[str]:
+    """Extract pricing content from club text (lines 4-22: Member Type through Availability)."""
+    # Extract content from "Member Type:" through "Availability:" section
+    # This captures everything after "Pricing Details:" heading
+    match = _TXT_PRICING_RE.search(content)
+    if match:
+        pricing_content = match.group(0).strip()
+        return pricing_content
+    
+    return None
+
+
+def read_pricing_content_from_txt(filepath: Path, log: Optional[List[str]] = None) -> Optional[str]:
     """Read pricing content from text file (lines 4-22: Member Type through Availability)."""
     try:
         with open(filepath, 'r', encoding='utf-8') as f:
             content = f.read()
         
-        # Extract content from "Member Type:" through "Availability:" section
-        # This captures everything after "Pricing Details:" heading
-        match = re.search(r'Member Type:.*?(?=\n\s*$|\Z)', content, re.DOTALL)
-        if match:
-            pricing_content = match.group(0).strip()
-            return pricing_content
-        
-        return None
+        return extract_pricing_content(content)
     except Exception as e:
-        print(f"Error reading {filepath}: {e}")
+        _log(log, f"Error reading {filepath}: {e}")
         return None
 
 
-def replace_pricing_section_in_md(md_filepath: Path, new_pricing_content: str, club_name: str) -> bool:
-    """Replace the pricing content section in markdown file."""
-    try:
-        with open(md_filepath, 'r', encoding='utf-8') as f:
-            content = f.read()
-        
-        # Pattern to find the pricing content block:
-        # Starts with "Member Type:" and ends with the last known closing line
-        # Handles: Elevate Offering (standard), Insurance Availability, or SILVER SNEAKERS
-        pattern = r'Member Type:.*?(?:Elevate Offering|Insurance Availability|SILVER SNEAKERS):.*?(?=\n\n|\n\[Get Started\]|\Z)'
-        
-        match = re.search(pattern, content, re.DOTALL)
-        if match:
-            # Replace the old pricing content with new content
-            new_content = content.replace(match.group(0), new_pricing_content)
-            
-            # Write back to file
-            with open(md_filepath, 'w', encoding='utf-8') as f:
-                f.write(new_content)
-            
-            return True
-        else:
-            print(f"  [!] Could not find pricing content pattern in file")
-            return False
+def _find_pricing_block(content: str) -> Optional[Tuple[int, int]]:
+    """
+    Locate the pricing content block in markdown text using plain substring scans.
+    The block runs from the first "Member Type:" through the first closing label after it,
+    up to the next blank line, "[Get Started]" link or the end of the text.
+    Returns (start, end) or None if there is no such block.
+    """
+    start = content.find(_MD_PRICING_START)
+    if start == -1:
+        return None
     
-    except Exception as e:
-        print(f"Error processing {md_filepath}: {e}")
-        return False
+    label_positions = [
+        pos for pos in (content.find(label, start + len(_MD_PRICING_START)) for label in _MD_PRICING_CLOSING_LABELS)
+        if pos != -1
+    ]
+    if not label_positions:
+        return None
+    label_pos = min(label_positions)
+    
+    terminator_positions = [
+        pos for pos in (content.find(terminator, label_pos) for terminator in _MD_PRICING_TERMINATORS)
+        if pos != -1
+    ]
+    end = min(terminator_positions) if terminator_positions else len(content)
+    
+    return (start, end)
+
+
+def _replace_pricing_section(content: str, new_pricing_content: str) -> Tuple[str, bool]:
+    """Replace the pricing content section in markdown text. Returns (new_content, found)."""
+    block = _find_pricing_block(content)
+    if block:
+        # Replace the old pricing content with new content
+        start, end = block
+        return (content.replace(content[start:end], new_pricing_content), True)
+    
+    return (content, False)
 
 
-def replace_enhancement_fee_text(md_filepath: Path) -> bool:
+def _find_heading_at_line_end(text: str, heading: str) -> int:
+    """
+    Return the index of the first occurrence of heading in text that is followed only
+    by whitespace up to the end of its line, or -1 if there is none.
+    """
+    pos = text.find(heading)
+    while pos != -1:
+        tail = text[pos + len(heading):]
+        stripped = tail.lstrip()
+        if not stripped or '\n' in tail[:len(tail) - len(stripped)]:
+            return pos
+        pos = text.find(heading, pos + 1)
+    return -1
+
+
+def _find_fee_anchor(content: str) -> int:
+    """Return the index of the first "annual enhancement fee" (any case) in content, or -1."""
+    # Each non-ASCII character becomes a single '?', so byte offsets equal string offsets
+    return content.encode('ascii', 'replace').lower().find(_FEE_ANCHOR)
+
+
+def _replace_enhancement_fee(content: str) -> Tuple[str, bool]:
     """
     Replace all variations of Annual Enhancement Fee text with standardized version.
     Uses a flexible approach to find and replace any text containing:
     - "Annual Enhancement Fee" (case-insensitive)
     - "$49.99" and "$89.98"
     - "$2.99" credit card fee mention
+    Returns (new_content, success); success is also True when the text is already up to date.
     """
-    try:
-        with open(md_filepath, 'r', encoding='utf-8') as f:
-            content = f.read()
-        
-        # New standardized enhancement fee text
-        new_enhancement_fee_text = """*Annual enhancement fee of $49.95 for the first member and $89.95 for all memberships with two or more persons will be billed 60 days from the join date, then every 12 months thereafter for the duration of the membership. If you choose to use a credit or debit card for your method of payment, additional $4.99 credit card fee added to your dues.
-
-*Amenities and programming vary by location. Monthly retail rebate valid on in-club purchases of drinks, snacks and shakes and excludes day passes and discounted items. Rebate not to exceed monthly dues amount. Relax & Recover available at select clubs. For guest passes, guest must be 18+ and accompany a member. One guest per visit. All access pass is one time per month and expires at the end of the month.
-
-*Reservations are required. A $2 no-show fee will be applied if reservations are not cancelled 2 hours prior."""
-        
-        # Check if the new text is already present (file was already updated)
-        # Look for the unique part of the new text: "$49.95 for the first member"
-        if '$49.95 for the first member' in content and '$89.95 for all memberships' in content:
-            # Already has the new text, return True (success - already updated)
-            return True
-        
-        # Find the position of "Annual Enhancement Fee" (case-insensitive)
-        fee_pos = content.lower().find('annual enhancement fee')
-        if fee_pos == -1:
-            return False
-        
-        # Check for generic pattern: "An Annual Enhancement Fee applies" without specific dollar amounts
-        # Search in a wider range that includes text before fee_pos (since "An" comes before "Annual")
-        search_start = max(0, fee_pos - 50)
-        remaining_text = content[search_start:fee_pos+400]
-        
-        # Check if this is the generic pattern (has "applies" but no dollar amounts)
-        has_applies = 'applies' in remaining_text.lower() and 'annual enhancement fee' in remaining_text.lower()
-        has_dollar_amounts = '$49.99' in remaining_text or '$89.98' in remaining_text or '$2.99' in remaining_text
-        
-        if has_applies and not has_dollar_amounts:
-            # Found generic pattern - find where "An Annual Enhancement Fee applies" starts
-            an_pos = content.lower().find('an annual enhancement fee applies', search_start)
-            if an_pos == -1:
-                an_pos = fee_pos  # Fallback to fee_pos
-            
-            # Look backwards to find start (check for "**Note:**" heading)
-            before_text = content[max(0, an_pos-200):an_pos]
-            note_match = re.search(r'(\*\*Note:\*\*\s*)$', before_text, re.MULTILINE)
-            
-            if note_match:
-                start_pos = an_pos - (len(before_text) - note_match.start())
-            else:
-                line_start = content.rfind('\n', max(0, an_pos-200), an_pos)
-                if line_start != -1:
-                    start_pos = line_start + 1
-                else:
-                    start_pos = max(0, an_pos - 50)
-            
-            # Find end - look for "Other terms and conditions apply" or link after the generic text
-            after_text = content[an_pos:an_pos+300]
-            
-            preserved_text = ""
-            end_pos = an_pos
-            
-            # Check for "Other terms and conditions apply" or link
-            terms_match = re.search(r'(.*?Other\s+terms\s+and\s+conditions\s+apply[^.]*?\.?\s*(?:\[Click\s+here[^\]]*?\]\([^\)]+\))?)', after_text, re.IGNORECASE | re.DOTALL)
-            link_match = re.search(r'(.*?\[Click\s+here[^\]]*?\]\([^\)]+\))', after_text, re.IGNORECASE | re.DOTALL)
-            
-            if terms_match:
-                # Extract just the "Other terms" part for preservation
-                preserved_match = re.search(r'(Other\s+terms\s+and\s+conditions\s+apply[^.]*?\.?\s*(?:\[Click\s+here[^\]]*?\]\([^\)]+\))?)', terms_match.group(0), re.IGNORECASE | re.DOTALL)
-                if preserved_match:
-                    preserved_text = "\n\n" + preserved_match.group(1).strip()
-                    # End position is where "Other terms" starts
-                    end_pos = an_pos + terms_match.start() + terms_match.group(0).find(preserved_match.group(1))
-                else:
-                    end_pos = an_pos + terms_match.end()
-            elif link_match and link_match.start() < 200:
-                preserved_match = re.search(r'(\[Click\s+here[^\]]*?\]\([^\)]+\))', link_match.group(0), re.IGNORECASE)
-                if preserved_match:
-                    preserved_text = "\n\n" + preserved_match.group(1).strip()
-                    # End position is where link starts
-                    end_pos = an_pos + link_match.start() + link_match.group(0).find(preserved_match.group(1))
-                else:
-                    end_pos = an_pos + link_match.end()
-            else:
-                # No "Other terms" or link found - find end of sentences
-                end_match = re.search(r'(.*?\.\s*(?:\n|$))', after_text, re.DOTALL)
-                if end_match:
-                    # Check if there's another sentence
-                    next_sentence = re.search(r'(.*?\.\s+.*?\.\s*(?:\n|$))', after_text, re.DOTALL)
-                    if next_sentence:
-                        end_pos = an_pos + next_sentence.end()
-                    else:
-                        end_pos = an_pos + end_match.end()
-                else:
-                    end_pos = an_pos + len(after_text.split('\n')[0]) if '\n' in after_text else len(after_text)
-            
-            # Perform replacement
-            replacement = new_enhancement_fee_text + preserved_text
-            new_content = content[:start_pos] + replacement + content[end_pos:]
-            
-            # Write back
-            with open(md_filepath, 'w', encoding='utf-8') as f:
-                f.write(new_content)
-            
-            return True
-        
-        # Check if old pattern "$49.99" exists nearby (within 500 chars) - this indicates old text needs replacement
-        amount_pos = content.find('$49.99', fee_pos)
-        if amount_pos == -1 or amount_pos > fee_pos + 500:
-            # Check if old pattern "$89.98" exists (another indicator of old text)
-            if '$89.98' in content[fee_pos:fee_pos+500]:
-                # Has old $89.98 pattern, continue with replacement
-                pass
-            else:
-                # No old pattern found - enhancement fee text exists but doesn't match old or new pattern
-                # This might be a different format, return False (not found/not replaced)
-                return False
+    # Check if the new text is already present (file was already updated)
+    # Look for the unique part of the new text: "$49.95 for the first member".
+    # Plain substring checks first: no lowercased copy of the file is needed here.
+    if '$49.95 for the first member' in content and '$89.95 for all memberships' in content:
+        # Already has the new text, return True (success - already updated)
+        return (content, True)
+    
+    # Find the position of "Annual Enhancement Fee" (case-insensitive)
+    fee_pos = _find_fee_anchor(content)
+    if fee_pos == -1:
+        return (content, False)
+    
+    # Check for generic pattern: "An Annual Enhancement Fee applies" without specific dollar amounts
+    # Search in a wider range that includes text before fee_pos (since "An" comes before "Annual")
+    search_start = max(0, fee_pos - 50)
+    remaining_text = content[search_start:fee_pos+400]
+    
+    # Check if this is the generic pattern (has "applies" but no dollar amounts)
+    remaining_lower = remaining_text.lower()
+    has_applies = 'applies' in remaining_lower and 'annual enhancement fee' in remaining_lower
+    has_dollar_amounts = '$49.99' in remaining_text or '$89.98' in remaining_text or '$2.99' in remaining_text
+    
+    if has_applies and not has_dollar_amounts:
+        # Found generic pattern - find where "An Annual Enhancement Fee applies" starts
+        an_match = _FEE_APPLIES_RE.search(content, search_start)
+        an_pos = an_match.start() if an_match else fee_pos  # Fallback to fee_pos
         
-        # Look backwards to find the start of this section
-        # Check for "**Note:**" or "**Additional Fees:**" headings
-        before_text = content[max(0, fee_pos-200):fee_pos]
-        note_match = re.search(r'(\*\*Note:\*\*\s*)$', before_text, re.MULTILINE)
-        additional_match = re.search(r'(\*\*Additional\s+Fees?:\*\*\s*)$', before_text, re.MULTILINE | re.IGNORECASE)
+        # Look backwards to find start (check for "**Note:**" heading)
+        before_text = content[max(0, an_pos-200):an_pos]
+        note_pos = _find_heading_at_line_end(before_text, '**Note:**')
         
-        if note_match:
-            start_pos = fee_pos - (len(before_text) - note_match.start())
-        elif additional_match:
-            start_pos = fee_pos - (len(before_text) - additional_match.start())
+        if note_pos != -1:
+            start_pos = an_pos - (len(before_text) - note_pos)
         else:
-            # Look for start of line or bullet point
-            line_start = content.rfind('\n', max(0, fee_pos-200), fee_pos)
+            line_start = content.rfind('\n', max(0, an_pos-200), an_pos)
             if line_start != -1:
                 start_pos = line_start + 1
             else:
-                start_pos = max(0, fee_pos - 50)
+                start_pos = max(0, an_pos - 50)
         
-        # Now find where this section ends
-        # Start from the enhancement fee mention and look for the end
-        search_start = fee_pos
-        remaining = content[search_start:]
+        # Find end - look for "Other terms and conditions apply" or link after the generic text
+        after_text = content[an_pos:an_pos+300]
         
-        # Try to find end by looking for:
-        # 1. Period followed by newline(s) and next content
-        # 2. "Other terms and conditions apply"
-        # 3. Link pattern
+        preserved_text = ""
+        end_pos = an_pos
         
-        # First check for "Other terms" or link
-        terms_pattern = r'.*?(?=\s+Other\s+terms\s+and\s+conditions\s+apply|\[Click\s+here|\n\n#|\Z)'
-        terms_match = re.search(terms_pattern, remaining, re.IGNORECASE | re.DOTALL)
+        # Check for "Other terms and conditions apply" or link
+        terms_match = _TERMS_RE.search(after_text)
+        link_match = _CLICK_RE.search(after_text) if not terms_match else None
         
         if terms_match:
-            matched_text = terms_match.group(0)
-            # Check if we captured the credit card fee mention
-            if '$2.99' in matched_text or 'credit card' in matched_text.lower() or 'debit card' in matched_text.lower():
-                end_pos = search_start + len(matched_text)
-                # Check what comes after
-                after_text = remaining[len(matched_text):len(matched_text)+100]
-                preserved_match = re.search(r'(Other\s+terms\s+and\s+conditions\s+apply[^.]*?\.?\s*(?:\[Click\s+here[^\]]*?\]\([^\)]+\))?|\[Click\s+here[^\]]*?\]\([^\)]+\))', after_text, re.IGNORECASE | re.DOTALL)
-                if preserved_match:
-                    end_pos += preserved_match.end()
-                    preserved_text = "\n\n" + preserved_match.group(1).strip()
-                else:
-                    preserved_text = ""
-            else:
-                # Need to extend to find credit card fee
-                extended_match = re.search(r'.*?\$2\.99.*?(?=\s+Other\s+terms\s+and\s+conditions\s+apply|\[Click\s+here|\n\n#|\Z)', remaining, re.IGNORECASE | re.DOTALL)
-                if extended_match:
-                    end_pos = search_start + len(extended_match.group(0))
-                    after_text = remaining[len(extended_match.group(0)):len(extended_match.group(0))+100]
-                    preserved_match = re.search(r'(Other\s+terms\s+and\s+conditions\s+apply[^.]*?\.?\s*(?:\[Click\s+here[^\]]*?\]\([^\)]+\))?|\[Click\s+here[^\]]*?\]\([^\)]+\))', after_text, re.IGNORECASE | re.DOTALL)
-                    if preserved_match:
-                        end_pos += preserved_match.end()
-                        preserved_text = "\n\n" + preserved_match.group(1).strip()
-                    else:
-                        preserved_text = ""
-                else:
-                    end_pos = search_start + len(matched_text)
-                    preserved_text = ""
+            # Preserve the "Other terms" part; end position is where it starts
+            preserved_text = "\n\n" + terms_match.group(0).strip()
+            end_pos = an_pos + terms_match.start()
+        elif link_match:
+            # Preserve the link; end position is where it starts
+            preserved_text = "\n\n" + link_match.group(0).strip()
+            end_pos = an_pos + link_match.start()
         else:
-            # Fallback: find end of paragraph/section
-            end_match = re.search(r'.*?\.\s*\*?\s*(?:\n\n|\n#|\Z)', remaining, re.DOTALL)
+            # No "Other terms" or link found - find end of sentences
+            end_match = _SENTENCE_END_RE.search(after_text)
             if end_match:
-                matched_text = end_match.group(0)
-                if '$2.99' in matched_text or 'credit card' in matched_text.lower() or 'debit card' in matched_text.lower():
-                    end_pos = search_start + len(matched_text)
-                    preserved_text = ""
+                # Check if there's another sentence
+                next_sentence = _TWO_SENTENCES_END_RE.search(after_text)
+                if next_sentence:
+                    end_pos = an_pos + next_sentence.end()
                 else:
-                    # Look for next line with credit card fee
-                    next_line_match = re.search(r'.*?\.\s*\*?\s*\n\s*\*?\s*.*?\$2\.99.*?(?:\n\n|\n#|\Z)', remaining, re.IGNORECASE | re.DOTALL)
-                    if next_line_match:
-                        end_pos = search_start + len(next_line_match.group(0))
-                        preserved_text = ""
-                    else:
-                        end_pos = search_start + len(matched_text)
-                        preserved_text = ""
+                    end_pos = an_pos + end_match.end()
             else:
-                # Last resort: replace up to next major break
-                end_match = re.search(r'.*?(?=\n\n|\n#|\Z)', remaining, re.DOTALL)
-                if end_match:
-                    end_pos = search_start + len(end_match.group(0))
-                    preserved_text = ""
-                else:
-                    return False
+                end_pos = an_pos + len(after_text.split('\n')[0]) if '\n' in after_text else len(after_text)
         
         # Perform replacement
-        replacement = new_enhancement_fee_text + preserved_text
-        new_content = content[:start_pos] + replacement + content[end_pos:]
-        
-        # Write back
-        with open(md_filepath, 'w', encoding='utf-8') as f:
-            f.write(new_content)
-        
-        return True
+        replacement = _NEW_ENHANCEMENT_FEE_TEXT + preserved_text
+        return (content[:start_pos] + replacement + content[end_pos:], True)
+    
+    # Check if old pattern "$49.99" exists nearby (within 500 chars) - this indicates old text needs replacement
+    amount_pos = content.find('$49.99', fee_pos)
+    if amount_pos == -1 or amount_pos > fee_pos + 500:
+        # Check if old pattern "$89.98" exists (another indicator of old text)
+        if '$89.98' in content[fee_pos:fee_pos+500]:
+            # Has old $89.98 pattern, continue with replacement
+            pass
+        else:
+            # No old pattern found - enhancement fee text exists but doesn't match old or new pattern
+            # This might be a different format, return False (not found/not replaced)
+            return (content, False)
+    
+    # Look backwards to find the start of this section
+    # Check for "**Note:**" or "**Additional Fees:**" headings
+    before_text = content[max(0, fee_pos-200):fee_pos]
+    note_pos = _find_heading_at_line_end(before_text, '**Note:**')
+    additional_match = _ADDITIONAL_FEES_RE.search(before_text)
+    
+    if note_pos != -1:
+        start_pos = fee_pos - (len(before_text) - note_pos)
+    elif additional_match:
+        start_pos = fee_pos - (len(before_text) - additional_match.start())
+    else:
+        # Look for start of line or bullet point
+        line_start = content.rfind('\n', max(0, fee_pos-200), fee_pos)
+        if line_start != -1:
+            start_pos = line_start + 1
+        else:
+            start_pos = max(0, fee_pos - 50)
+    
+    # Now find where this section ends
+    # Start from the enhancement fee mention and look for the end
+    search_start = fee_pos
+    remaining = content[search_start:]
+    
+    # The section ends just before "Other terms and conditions apply", a
+    # "[Click here" link, the next "#" heading or the end of the file
+    end_match = _SECTION_END_RE.search(remaining)
+    matched_text = remaining[:end_match.start()] if end_match else remaining
+    
+    # Check if we captured the credit card fee mention
+    matched_lower = matched_text.lower()
+    if '$2.99' in matched_text or 'credit card' in matched_lower or 'debit card' in matched_lower:
+        section_len = len(matched_text)
+    else:
+        # Need to extend to find credit card fee
+        card_pos = remaining.find('$2.99')
+        if card_pos != -1:
+            end_match = _SECTION_END_RE.search(remaining, card_pos + len('$2.99'))
+            section_len = end_match.start() if end_match else len(remaining)
+        else:
+            section_len = None
+    
+    if section_len is not None:
+        end_pos = search_start + section_len
+        # Check what comes after
+        after_text = remaining[section_len:section_len+100]
+        preserved_match = _TERMS_OR_CLICK_RE.search(after_text)
+        if preserved_match:
+            end_pos += preserved_match.end()
+            preserved_text = "\n\n" + preserved_match.group(0).strip()
+        else:
+            preserved_text = ""
+    else:
+        end_pos = search_start + len(matched_text)
+        preserved_text = ""
+    
+    # Perform replacement
+    replacement = _NEW_ENHANCEMENT_FEE_TEXT + preserved_text
+    return (content[:start_pos] + replacement + content[end_pos:], True)
+
+
+def _load_md_source(md_filepath: Path) -> Optional[str]:
+    """
+    Memory-map a markdown file and check for the pricing block and enhancement fee anchors
+    on the raw bytes, so files with nothing to update are never decoded.
+    Returns the decoded text (newlines translated as in a text-mode read) if there is
+    anything to update, otherwise None.
+    """
+    with open(md_filepath, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return None
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            if (mm.find(_MD_PRICING_START.encode()) == -1
+                    and mm.find(b'$49.95 for the first member') == -1):
+                # bytes.lower() folds ASCII only, so this matches the anchor in any case
+                if mm[:].lower().find(_FEE_ANCHOR) == -1:
+                    return None
+            content = str(mm, 'utf-8')
+    
+    if '\r' in content:
+        content = content.replace('\r\n', '\n').replace('\r', '\n')
+    return content
+
+
+def _copy_source(md_filepath: Path, output_filepath: Path, log: Optional[List[str]] = None) -> None:
+    """Copy md_filepath to output_filepath unchanged (bytes and metadata), unless they are the same file."""
+    if output_filepath == md_filepath:
+        return
+    try:
+        shutil.copy2(md_filepath, output_filepath)
+    except Exception as e:
+        _log(log, f"Error writing {output_filepath}: {e}")
+
+
+def _pricing_sentinel(pricing_content: str, md_filepath: Path) -> Optional[str]:
+    """
+    Sentinel line marking markdown updated from this source file (resolved path, size
+    and modification time) with this pricing content and fee text.
+    Returns None if the source file cannot be stat'ed.
+    """
+    try:
+        source = md_filepath.resolve()
+        st = md_filepath.stat()
+    except OSError:
+        return None
+    digest = hashlib.sha256(
+        f"{source}\0{st.st_size}\0{st.st_mtime_ns}\0"
+        f"{pricing_content}\0{_NEW_ENHANCEMENT_FEE_TEXT}".encode('utf-8')
+    ).hexdigest()[:16]
+    return f"{_SENTINEL_PREFIX}{digest}{_SENTINEL_SUFFIX}"
+
+
+def _is_already_updated(output_filepath: Path, sentinel: Optional[str]) -> bool:
+    """
+    Check whether output_filepath already starts with sentinel, i.e. it was built from
+    the same source file with the same pricing and updating it again would produce the
+    same file.
+    """
+    if sentinel is None:
+        return False
+    try:
+        with open(output_filepath, 'rb') as f:
+            first_line = f.readline(len(sentinel) + 2)
+    except OSError:
+        return False
+    return first_line.rstrip(b'\r\n') == sentinel.rstrip('\n').encode('utf-8')
+
+
+def update_md_file(md_filepath: Path, new_pricing_content: str, club_name: str,
+                   output_filepath: Optional[Path] = None,
+                   log: Optional[List[str]] = None,
+                   sentinel: Optional[str] = None) -> Tuple[bool, bool]:
+    """
+    Replace the pricing section and the Annual Enhancement Fee text in a markdown file.
+    Reads md_filepath once and writes the result once to output_filepath (defaults to
+    updating md_filepath in place, in which case unchanged files are not rewritten).
+    Files where nothing was replaced, or that cannot be read, are copied to
+    output_filepath byte for byte.
+    If sentinel is given, it is written as the first line when both sections were updated.
+    Returns tuple of (pricing_success, enhancement_fee_success).
+    """
+    output_filepath = output_filepath or md_filepath
     
+    try:
+        content = _load_md_source(md_filepath)
+    except Exception as e:
+        _log(log, f"Error processing {md_filepath}: {e}")
+        _copy_source(md_filepath, output_filepath, log)
+        return (False, False)
+    
+    if content is None:
+        _log(log, f"  [!] Could not find pricing content pattern in file")
+        _copy_source(md_filepath, output_filepath, log)
+        return (False, False)
+    
+    # Drop a sentinel left by an earlier in-place update; it is written again below if still valid
+    body = content
+    if body.startswith(_SENTINEL_PREFIX):
+        body = body[body.find('\n') + 1:]
+    
+    new_content, pricing_success = _replace_pricing_section(body, new_pricing_content)
+    if not pricing_success:
+        _log(log, f"  [!] Could not find pricing content pattern in file")
+    
+    try:
+        new_content, enhancement_fee_success = _replace_enhancement_fee(new_content)
     except Exception as e:
-        print(f"Error replacing enhancement fee text in {md_filepath}: {e}")
+        _log(log, f"Error replacing enhancement fee text in {md_filepath}: {e}")
         import traceback
         traceback.print_exc()
-        return False
+        enhancement_fee_success = False
+    
+    # Nothing replaced (e.g. fee text already current, no pricing block): keep the source bytes
+    if not pricing_success and new_content == body:
+        _copy_source(md_filepath, output_filepath, log)
+        return (pricing_success, enhancement_fee_success)
+    
+    if sentinel and pricing_success and enhancement_fee_success:
+        new_content = sentinel + new_content
+    
+    if new_content != content or output_filepath != md_filepath:
+        try:
+            with open(output_filepath, 'w', encoding='utf-8') as f:
+                f.write(new_content)
+        except Exception as e:
+            _log(log, f"Error writing {output_filepath}: {e}")
+            return (False, False)
+    
+    return (pricing_success, enhancement_fee_success)
+
 
+def _normalized_names(paths: Iterable[Path], extractor) -> List[Tuple[str, Path]]:
+    """Pair each file (e.g. from a single directory glob) with its normalized club name."""
+    return [(sys.intern(normalize_club_name(extractor(path))), path) for path in paths]
 
-def build_club_mapping(txt_dir: Path, md_dir: Path) -> Dict[Path, list]:
+
+def build_club_mapping(txt_dir: Path, md_dir: Path,
+                       log: Optional[List[str]] = None,
+                       txt_files: Optional[List[Path]] = None) -> Dict[Path, list]:
     """Build mapping between text files and markdown files based on club names.
+    txt_files, if given, is used instead of the *.txt files in txt_dir.
     Returns a dictionary where each text file can map to multiple markdown files."""
     mapping = {}
     
@@ -466,22 +663,13 @@ def build_club_mapping(txt_dir: Path, md_dir: Path) -> Dict[Path, list]:
         'midtown': ['midtown', 'downtown'],  # Midtown content goes to both files
     }
     
-    # Get all text files
-    txt_files = list(txt_dir.glob('*.txt'))
-    md_files = list(md_dir.glob('*_clean.md'))
-    
     # Create normalized name to file mapping for markdown files
-    md_name_map = {}
-    for md_file in md_files:
-        club_name = extract_club_name_from_md(md_file)
-        normalized = normalize_club_name(club_name)
-        md_name_map[normalized] = md_file
-    
-    # Match text files to markdown files
-    for txt_file in txt_files:
-        club_name = extract_club_name_from_txt(txt_file)
-        normalized = normalize_club_name(club_name)
-        
+    md_name_map = dict(_normalized_names(md_dir.glob('*_clean.md'), extract_club_name_from_md))
+    
+    # Match text files to markdown files (kept as pairs: several TXT files may normalize alike)
+    if txt_files is None:
+        txt_files = txt_dir.glob('*.txt')
+    for normalized, txt_file in _normalized_names(txt_files, extract_club_name_from_txt):
         # Check for multi-mappings first (one-to-many)
         if normalized in multi_mappings:
             md_file_list = []
@@ -489,7 +677,7 @@ def build_club_mapping(txt_dir: Path, md_dir: Path) -> Dict[Path, list]:
                 if target_name in md_name_map:
                     md_file_list.append(md_name_map[target_name])
                 else:
-                    print(f"Warning: Multi-mapping target '{target_name}' not found for {txt_file.name}")
+                    _log(log, f"Warning: Multi-mapping target '{target_name}' not found for {txt_file.name}")
             if md_file_list:
                 mapping[txt_file] = md_file_list
         # Check for direct match
@@ -501,24 +689,119 @@ def build_club_mapping(txt_dir: Path, md_dir: Path) -> Dict[Path, list]:
             if special_normalized in md_name_map:
                 mapping[txt_file] = [md_name_map[special_normalized]]
             else:
-                print(f"Warning: No matching MD file found for {txt_file.name} (normalized: '{normalized}', special: '{special_normalized}')")
+                _log(log, f"Warning: No matching MD file found for {txt_file.name} (normalized: '{normalized}', special: '{special_normalized}')")
         else:
-            print(f"Warning: No matching MD file found for {txt_file.name} (normalized: '{normalized}')")
+            _log(log, f"Warning: No matching MD file found for {txt_file.name} (normalized: '{normalized}')")
     
     return mapping
 
 
+def process_club(
+    txt_file: Path,
+    md_files: List[Path],
+    csv_index: Optional[Tuple[List[Tuple[int, str]], Dict[str, List[FeeRow]]]],
+    updated_dir: Path,
+    club_text: Optional[str] = None,
+) -> Tuple[Tuple[int, int, int, int, int], List[str]]:
+    """
+    Update the markdown files mapped to one club TXT file, writing results to updated_dir.
+    club_text, if given, is the TXT file's content and the file itself is not read.
+    Log lines are buffered rather than printed so clubs can be processed in parallel.
+    Returns ((success, failed, files_processed, enhancement_fee_success,
+    enhancement_fee_failed), log_lines).
+    """
+    log = []
+    success_count = 0
+    failed_count = 0
+    files_processed = 0
+    enhancement_fee_success_count = 0
+    enhancement_fee_failed_count = 0
+    
+    club_name = extract_club_name_from_txt(txt_file)
+    log.append(f"\nProcessing: {club_name}")
+    log.append(f"  TXT: {txt_file.name}")
+    
+    # Try to read from CSV first (to get additional columns), fallback to text file
+    pricing_content = None
+    additional_columns = []
+    
+    if csv_index:
+        csv_result = build_pricing_lines(club_name, *csv_index, log=log)
+        if csv_result:
+            pricing_content, additional_columns = csv_result
+            if additional_columns:
+                log.append(f"  [✓] Found {len(additional_columns)} additional column(s): {', '.join(additional_columns)}")
+            else:
+                log.append(f"  [i] No additional columns found after Lifestyle Network Plus")
+    
+    # Fallback to text file if CSV reading failed or not available
+    if not pricing_content:
+        if club_text is not None:
+            pricing_content = extract_pricing_content(club_text)
+        else:
+            pricing_content = read_pricing_content_from_txt(txt_file, log=log)
+    
+    if not pricing_content:
+        log.append(f"  [X] Failed to read pricing content")
+        failed_count += len(md_files)
+        return ((success_count, failed_count, files_processed,
+                 enhancement_fee_success_count, enhancement_fee_failed_count), log)
+    
+    # Process each markdown file associated with this text file
+    for md_file in md_files:
+        log.append(f"  MD:  {md_file.name}")
+        files_processed += 1
+        
+        # Fully updated files are marked with a sentinel for their source and pricing;
+        # skip files already written by an earlier run from the same source and pricing
+        sentinel = _pricing_sentinel(pricing_content, md_file)
+        updated_md_file = updated_dir / md_file.name
+        if _is_already_updated(updated_md_file, sentinel):
+            log.append(f"    [=] Already up to date: {updated_md_file.name}")
+            success_count += 1
+            enhancement_fee_success_count += 1
+            continue
+        
+        # Write the updated markdown straight to the updated directory
+        # (one read of the source, one write of the result)
+        log.append(f"    -> Writing to: {updated_md_file.name}")
+        pricing_success, enhancement_fee_success = update_md_file(
+            md_file, pricing_content, club_name, output_filepath=updated_md_file, log=log,
+            sentinel=sentinel
+        )
+        
+        if pricing_success:
+            log.append(f"    [OK] Successfully updated pricing section")
+            success_count += 1
+        else:
+            log.append(f"    [X] Failed to update pricing section (section not found)")
+            failed_count += 1
+        
+        if enhancement_fee_success:
+            log.append(f"    [OK] Successfully updated enhancement fee text")
+            enhancement_fee_success_count += 1
+        else:
+            log.append(f"    [!] Could not find enhancement fee text in: {md_file.name}")
+            enhancement_fee_failed_count += 1
+    
+    return ((success_count, failed_count, files_processed,
+             enhancement_fee_success_count, enhancement_fee_failed_count), log)
+
+
 def run(
     txt_dir: Optional[Path] = None,
     md_dir: Optional[Path] = None,
     updated_dir: Optional[Path] = None,
     csv_file: Optional[Path] = None,
     project_dir: Optional[Path] = None,
+    club_texts: Optional[Dict[str, str]] = None,
 ) -> None:
     """
     Process all club files: map TXT pricing files to MD location files,
-    copy MD to output dir and update pricing/enhancement fee sections.
+    write each MD to the output dir with updated pricing/enhancement fee sections.
     All path args are optional; defaults use project_dir and current date.
+    club_texts optionally maps club TXT file names to their contents (as produced by
+    split_club_files), in which case txt_dir is not read.
     """
     proj = project_dir or Path(__file__).parent
     current_date = datetime.now().strftime('%d-%m-%y')
@@ -529,7 +812,7 @@ def run(
     csv_file = csv_file or proj / 'NFC_file.csv'
 
     # Validate directories exist
-    if not txt_dir.exists():
+    if club_texts is None and not txt_dir.exists():
         print(f"Error: Directory not found: {txt_dir}")
         return
     
@@ -539,116 +822,85 @@ def run(
     
     # Create updated directory if it doesn't exist
     updated_dir.mkdir(exist_ok=True)
-    print(f"Output directory: {updated_dir}")
+    
+    # Log lines are buffered and written to stdout in batches
+    log = [f"Output directory: {updated_dir}"]
     
     # Build mapping
-    print("\nBuilding club file mappings...")
-    mapping = build_club_mapping(txt_dir, md_dir)
+    log.append("\nBuilding club file mappings...")
+    txt_files = [txt_dir / name for name in club_texts] if club_texts is not None else None
+    mapping = build_club_mapping(txt_dir, md_dir, log=log, txt_files=txt_files)
     
-    print(f"\nFound {len(mapping)} matching club pairs")
-    print("-" * 60)
+    log.append(f"\nFound {len(mapping)} matching club pairs")
+    log.append("-" * 60)
     
     # Process each pair (text file can map to multiple MD files)
     success_count = 0
     failed_count = 0
     total_files_processed = 0
+    enhancement_fee_success_count = 0
+    enhancement_fee_failed_count = 0
 
-    use_csv = csv_file.exists()
+    csv_index = None
     
-    if use_csv:
-        print(f"\nCSV file found: {csv_file.name}")
-        print("  Will check for additional columns after Lifestyle Network Plus")
+    if csv_file.exists():
+        log.append(f"\nCSV file found: {csv_file.name}")
+        log.append("  Will check for additional columns after Lifestyle Network Plus")
+        # Read the CSV once; each club is then a dict lookup
+        csv_index = load_csv_index(csv_file, log=log)
     
-    for txt_file, md_files in mapping.items():
-        club_name = extract_club_name_from_txt(txt_file)
-        print(f"\nProcessing: {club_name}")
-        print(f"  TXT: {txt_file.name}")
-        
-        # Try to read from CSV first (to get additional columns), fallback to text file
-        pricing_content = None
-        additional_columns = []
-        
-        if use_csv:
-            csv_result = read_pricing_content_from_csv(csv_file, club_name)
-            if csv_result:
-                pricing_content, additional_columns = csv_result
-                if additional_columns:
-                    print(f"  [✓] Found {len(additional_columns)} additional column(s): {', '.join(additional_columns)}")
-                else:
-                    print(f"  [i] No additional columns found after Lifestyle Network Plus")
-        
-        # Fallback to text file if CSV reading failed or not available
-        if not pricing_content:
-            pricing_content = read_pricing_content_from_txt(txt_file)
-        
-        if not pricing_content:
-            print(f"  [X] Failed to read pricing content")
-            failed_count += len(md_files)
-            continue
-        
-        # Process each markdown file associated with this text file
+    # Each MD file is written once per run. If several TXT files map to the same MD
+    # file, the last mapping wins (as when clubs were processed one after another)
+    # and earlier ones skip it instead of writing the same output file concurrently.
+    claimed = set()
+    club_tasks = []
+    for txt_file, md_files in reversed(list(mapping.items())):
         for md_file in md_files:
-            print(f"  MD:  {md_file.name}")
-            total_files_processed += 1
-            
-            # Copy markdown file to updated directory
-            updated_md_file = updated_dir / md_file.name
-            try:
-                shutil.copy2(md_file, updated_md_file)
-                print(f"    -> Copied to: {updated_md_file.name}")
-            except Exception as e:
-                print(f"    [X] Failed to copy file: {e}")
-                failed_count += 1
-                continue
-            
-            # Replace section in the copied markdown file
-            pricing_success = replace_pricing_section_in_md(updated_md_file, pricing_content, club_name)
-            
-            # Replace enhancement fee text
-            enhancement_fee_success = replace_enhancement_fee_text(updated_md_file)
-            
-            if pricing_success:
-                print(f"    [OK] Successfully updated pricing section")
-                success_count += 1
-            else:
-                print(f"    [X] Failed to update pricing section (section not found)")
-                failed_count += 1
-            
-            if enhancement_fee_success:
-                print(f"    [OK] Successfully updated enhancement fee text")
-            else:
-                print(f"    [!] Could not find enhancement fee text in: {md_file.name}")
+            if md_file in claimed:
+                log.append(f"Warning: {md_file.name} is also mapped from a later club file; skipping it for {txt_file.name}")
+        unclaimed = [md_file for md_file in md_files if md_file not in claimed]
+        claimed.update(md_files)
+        if unclaimed:
+            club_tasks.append((txt_file, unclaimed))
+    club_tasks.reverse()
+    _write_log(log)
     
-    # Process all files in updated directory for enhancement fee replacement
-    # (in case some files weren't processed in the mapping)
-    print("\n" + "=" * 60)
-    print("Replacing Annual Enhancement Fee text in all location files...")
-    print("=" * 60)
-    
-    enhancement_fee_success_count = 0
-    enhancement_fee_failed_count = 0
-    
-    for md_file in updated_dir.glob('*_clean.md'):
-        if replace_enhancement_fee_text(md_file):
-            enhancement_fee_success_count += 1
-        else:
-            enhancement_fee_failed_count += 1
-            print(f"  [!] Could not find enhancement fee text in: {md_file.name}")
+    # Clubs now write to different MD files, so they can be processed concurrently.
+    # Results (and their buffered log lines) are collected in mapping order.
+    max_workers = min(32, (os.cpu_count() or 1) * 4)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [
+            executor.submit(
+                process_club, txt_file, md_files, csv_index, updated_dir,
+                club_texts[txt_file.name] if club_texts is not None else None
+            )
+            for txt_file, md_files in club_tasks
+        ]
+        for future in futures:
+            counts, club_log = future.result()
+            _write_log(club_log)
+            success_count += counts[0]
+            failed_count += counts[1]
+            total_files_processed += counts[2]
+            enhancement_fee_success_count += counts[3]
+            enhancement_fee_failed_count += counts[4]
     
     # Summary
-    print("\n" + "=" * 60)
-    print(f"SUMMARY:")
-    print(f"  Output directory: {updated_dir}")
-    print(f"  Text files processed: {len(mapping)}")
-    print(f"  Total MD files updated: {total_files_processed}")
-    print(f"  Successful: {success_count}")
-    print(f"  Failed: {failed_count}")
-    print()
-    print(f"  Enhancement Fee Text Replacement:")
-    print(f"  Files processed: {enhancement_fee_success_count + enhancement_fee_failed_count}")
-    print(f"  Successful: {enhancement_fee_success_count}")
-    print(f"  Failed: {enhancement_fee_failed_count}")
-    print("=" * 60)
+    _write_log([
+        "\n" + "=" * 60,
+        f"SUMMARY:",
+        f"  Output directory: {updated_dir}",
+        f"  Text files processed: {len(mapping)}",
+        f"  Total MD files updated: {total_files_processed}",
+        f"  Successful: {success_count}",
+        f"  Failed: {failed_count}",
+        "",
+        f"  Enhancement Fee Text Replacement:",
+        f"  Files processed: {enhancement_fee_success_count + enhancement_fee_failed_count}",
+        f"  Successful: {enhancement_fee_success_count}",
+        f"  Failed: {enhancement_fee_failed_count}",
+        "=" * 60,
+    ])
 
 
 def main():
@@ -10,12 +10,225 @@ Date: 2025
 """
 
 import csv
+import io
+import mmap
+import os
 import sys
-from typing import Dict, List, Set
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from typing import Dict, List, Set, Tuple
 from collections import defaultdict, OrderedDict
 from datetime import datetime
 
 
+# Price cell values (after stripping) that mean the price is not offered
+_NOT_AVAILABLE_PRICES = frozenset({"", "-", "$-", "$"})
+
+# Program cell values (after stripping) that mean the program is not offered
+_NO_PROGRAM_VALUES = frozenset({"", "-"})
+
+# Order of programs in the Availability line
+_PROGRAM_ORDER = ["SILVER SNEAKERS", "ASH - Standard", "ASH - Premium", "Optum - Classic Core",
+                  "Optum - Premium Elite", "OPTUM RENEW", "Peer Fit"]
+
+# Club count from which clubs are formatted in worker processes; below it, starting
+# the pool costs more than formatting every club in this process
+_PARALLEL_MIN_CLUBS = 5000
+
+# Map of program names to their exact header patterns (lowercase)
+# These must match exactly or be the main part of the column name
+_PROGRAM_EXACT_MATCHES = {
+    program_name: tuple(pattern.lower() for pattern in patterns)
+    for program_name, patterns in {
+        "SILVER SNEAKERS": ["silver sneakers"],
+        "ASH - Standard": ["ash - standard", "ash standard"],
+        "ASH - Premium": ["ash - premium", "ash premium"],
+        "Optum - Classic Core": ["optum - classic core", "optum classic core"],
+        "Optum - Premium Elite": ["optum - premium elite", "optum premium elite"],
+        "OPTUM RENEW": ["optum renew", "optum renew - nfc"],
+        "Peer Fit": ["peer fit", "peerfit"]
+    }.items()
+}
+
+
+# Reverse map of every header pattern to its program
+_PATTERN_PROGRAMS = {
+    pattern: program_name
+    for program_name, patterns in _PROGRAM_EXACT_MATCHES.items()
+    for pattern in patterns
+}
+
+
+def _header_programs(header_lower: str) -> Set[str]:
+    """Programs whose pattern is the whole header, or the part before or after one
+    of its spaces (i.e. the header equals, starts with or ends with the pattern)."""
+    candidates = {header_lower}
+    space = header_lower.find(" ")
+    while space != -1:
+        candidates.add(header_lower[:space])
+        candidates.add(header_lower[space + 1:])
+        space = header_lower.find(" ", space + 1)
+    
+    programs = {_PATTERN_PROGRAMS[pattern] for pattern in candidates.intersection(_PATTERN_PROGRAMS)}
+    
+    # Additional check: make sure it's not a false match
+    # For "silver sneakers", reject if header contains "soccer" or "academy"
+    if "SILVER SNEAKERS" in programs and ("soccer" in header_lower or "academy" in header_lower):
+        programs.discard("SILVER SNEAKERS")
+    return programs
+
+
+@lru_cache(maxsize=8)
+def _detect_availability_columns(headers: Tuple[str, ...]) -> Tuple[Tuple[str, int], ...]:
+    """Return (program_name, column_index) pairs for the program columns in headers."""
+    detected_programs = {}
+    
+    # Check each header column for exact program name matches; the first column
+    # matching a program wins
+    for idx, header in enumerate(headers):
+        programs = _header_programs(header.strip().lower())
+        if not programs:
+            continue
+        
+        for program_name in _PROGRAM_EXACT_MATCHES:
+            if program_name in programs and program_name not in detected_programs:
+                detected_programs[program_name] = idx
+    
+    return tuple(detected_programs.items())
+
+
+def _read_csv_text(csv_file_path: str) -> str:
+    """Read the whole CSV through a read-only memory map and decode it in one go.
+    Line endings are normalised to "\n" as a text-mode open() would."""
+    with open(csv_file_path, 'rb') as file:
+        if os.fstat(file.fileno()).st_size == 0:
+            return ""  # mmap cannot map an empty file
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            text = str(mm, 'utf-8')
+    
+    if "\r" in text:
+        text = text.replace("\r\n", "\n").replace("\r", "\n")
+    return text
+
+
+def _clean_price(value: str) -> str:
+    """Clean and format an already stripped price value."""
+    # Empty, dash and bare-dollar values are not available
+    if value in _NOT_AVAILABLE_PRICES:
+        return "Not available"
+    
+    # Keep the value as is if it's already formatted
+    return value
+
+
+def _program_availability(rows: List[List[str]], available_programs: Dict[str, int]) -> Dict[str, str]:
+    """Extract program availability information from all rows for a club.
+    Only checks programs that exist in the CSV. Cells are stripped at ingest."""
+    availability = {}
+    
+    # Only check programs that exist in the CSV; each program's column is scanned
+    # on its own and the scan stops at the first row offering it
+    for program, col_idx in available_programs.items():
+        column = (row[col_idx] for row in rows if col_idx < len(row))
+        # Any actual price value or other non-empty, non-dash value means available
+        offered = any(value not in _NO_PROGRAM_VALUES for value in column)
+        availability[program] = "available" if offered else "not available"
+    
+    return availability
+
+
+def _format_one_club(task: Tuple[str, List[List[str]], Dict[str, int], List[str], List[str]]) -> str:
+    """
+    Format one club's section of the output, ending with its separator and blank line.
+    task is (club_name, rows, availability_programs, network_clubs, fee_types) and holds
+    only plain data, so clubs can be formatted in worker processes. The rows' cells
+    are already stripped.
+    """
+    club_name, rows, availability_programs, network_clubs, fee_types = task
+    
+    # Every line is written with its newline into one growing buffer
+    output = io.StringIO()
+    write = output.write
+    
+    # Get club basic info from first row
+    club_level, local_name, local_access, elevate_offering = rows[0][2:6]
+    
+    write(f"Club Name: {club_name}\n\nPricing Details:\n")
+    
+    # Process each fee type: (One Club, Local Network, Lifestyle Network Plus) prices
+    fee_data = {}
+    not_available = _NOT_AVAILABLE_PRICES
+    
+    for row in rows:
+        if len(row) < 15:
+            continue
+            
+        fee_type = row[6]
+        
+        # Columns 12-14 are One Club, Local Network and Lifestyle Network Plus
+        # (shorter rows were skipped above)
+        one_club, local_network, lifestyle_plus = row[12:15]
+        
+        # Special handling for Member Type row (shows membership codes, not prices);
+        # other rows get _clean_price's rule, inlined as it runs three times per row
+        if fee_type == "Member Type":
+            not_offered = ("",)
+        else:
+            not_offered = not_available
+        if one_club in not_offered:
+            one_club = "Not available"
+        if local_network in not_offered:
+            local_network = "Not available"
+        if lifestyle_plus in not_offered:
+            lifestyle_plus = "Not available"
+        
+        fee_data[fee_type] = (one_club, local_network, lifestyle_plus)
+    
+    # Get program availability from all rows for this club (only for programs that exist in CSV)
+    program_availability = _program_availability(rows, availability_programs)
+    
+    # Output pricing details in the specified order
+    for fee_type in fee_types:
+        if fee_type in fee_data:
+            one_club, local_network, lifestyle_plus = fee_data[fee_type]
+            write(
+                f"{fee_type}: One Club: {one_club} | "
+                f"Local Network: {local_network} | "
+                f"Lifestyle Network Plus: {lifestyle_plus}\n"
+            )
+    
+    write("\n")
+    
+    # Add network information
+    if local_name and local_name != "NA":
+        # Include the current club in the "Other Clubs" list
+        other_clubs_str = ", ".join(network_clubs) if network_clubs else ""
+        write(f"Network Name: {local_name} (Other Clubs: {other_clubs_str})\n")
+    else:
+        write("Network Name: Not available (Other Clubs: )\n")
+    
+    # Add elevate offering
+    if elevate_offering and elevate_offering not in ["", "NA", "Not available"]:
+        write(f"Elevate Offering: {elevate_offering}\n\n")
+    else:
+        write("Elevate Offering: Not available\n\n")
+    
+    # Add program availability (only if programs exist in CSV)
+    if availability_programs:
+        availability_parts = []
+        # Only include programs that were detected in the CSV, in _PROGRAM_ORDER
+        for program in _PROGRAM_ORDER:
+            if program in availability_programs:
+                status = program_availability.get(program, "not available")
+                availability_parts.append(f"{program}: {status}")
+        
+        if availability_parts:
+            write(f"Availability:\n{' | '.join(availability_parts)}\n")
+    
+    write("=" * 80 + "\n\n")
+    return output.getvalue()
+
+
 class InShapePricingFormatter:
     """
     Formats InShape pricing data from CSV to the specified text format.
@@ -59,100 +272,29 @@ class InShapePricingFormatter:
         
     def clean_price(self, value: str) -> str:
         """Clean and format price values."""
-        if not value or value.strip() == "" or value.strip() == "-":
-            return "Not available"
-        
-        # Remove whitespace and clean the value
-        value = value.strip()
-        
-        # Handle special cases
-        if value == "$-":
-            return "Not available"
-        if value == "$":
-            return "Not available"
-        
-        # Keep the value as is if it's already formatted
-        return value
+        return _clean_price(value.strip() if value else "")
     
-    def get_network_clubs(self, local_access: str, local_name: str, club_name: str, all_clubs: Dict) -> List[str]:
-        """Get list of clubs in the same network based on local name."""
+    def get_network_clubs(self, local_access: str, local_name: str, club_name: str,
+                          network_index: Dict[str, List[str]]) -> List[str]:
+        """Get list of clubs in the same network based on local name.
+        network_index maps each local name to the sorted names of its clubs."""
         if not local_name or local_name == "NA":
             return []
         
-        # Find all clubs with the same local_name (network)
-        network_clubs = []
-        for club_id, club_data in all_clubs.items():
-            if club_data.get('local_name') == local_name:
-                network_clubs.append(club_data['name'])
-        
-        return sorted(network_clubs)
+        return network_index.get(local_name, [])
     
     def get_program_availability(self, rows: List[List[str]], available_programs: Dict[str, int]) -> Dict[str, str]:
         """Extract program availability information from all rows for a club.
         Only checks programs that exist in the CSV."""
-        availability = {}
-        
-        # Only check programs that exist in the CSV
-        for program, col_idx in available_programs.items():
-            availability[program] = "not available"
-            
-            for row in rows:
-                if col_idx < len(row):
-                    value = row[col_idx].strip()
-                    # Look for actual price values (containing $ and digits) or any non-empty value
-                    if value and (("$" in value and any(c.isdigit() for c in value)) or (value != "" and value != "-")):
-                        availability[program] = "available"
-                        break
-                        
-        return availability
+        # Rows passed in here may be raw; _program_availability expects stripped cells
+        return _program_availability([[value.strip() for value in row] for row in rows],
+                                     available_programs)
     
     def detect_availability_columns(self, headers: List[str]) -> Dict[str, int]:
         """Detect which availability/program columns exist in the CSV header.
         Only matches exact program names to avoid false positives."""
-        detected_programs = {}
-        
-        # Map of program names to their exact header patterns
-        # These must match exactly or be the main part of the column name
-        program_exact_matches = {
-            "SILVER SNEAKERS": ["silver sneakers"],
-            "ASH - Standard": ["ash - standard", "ash standard"],
-            "ASH - Premium": ["ash - premium", "ash premium"],
-            "Optum - Classic Core": ["optum - classic core", "optum classic core"],
-            "Optum - Premium Elite": ["optum - premium elite", "optum premium elite"],
-            "OPTUM RENEW": ["optum renew", "optum renew - nfc"],
-            "Peer Fit": ["peer fit", "peerfit"]
-        }
-        
-        # Check each header column for exact program name matches
-        for idx, header in enumerate(headers):
-            header_clean = header.strip()
-            header_lower = header_clean.lower()
-            
-            for program_name, exact_patterns in program_exact_matches.items():
-                # Skip if already detected
-                if program_name in detected_programs:
-                    continue
-                    
-                # Check for exact matches - the header must contain the full program name
-                for pattern in exact_patterns:
-                    pattern_lower = pattern.lower()
-                    # Must be exact match or the header must start/end with the pattern
-                    # This prevents matching "Total Soccer Academy Silver" with "SILVER SNEAKERS"
-                    if (pattern_lower == header_lower or
-                        header_lower == pattern_lower or
-                        header_lower.startswith(pattern_lower + " -") or
-                        header_lower.startswith(pattern_lower + " ") or
-                        header_lower.endswith(" - " + pattern_lower) or
-                        header_lower.endswith(" " + pattern_lower)):
-                        # Additional check: make sure it's not a false match
-                        # For "silver sneakers", reject if header contains "soccer" or "academy"
-                        if "silver sneakers" in pattern_lower:
-                            if "soccer" in header_lower or "academy" in header_lower:
-                                continue
-                        detected_programs[program_name] = idx
-                        break
-        
-        return detected_programs
+        # The monthly CSVs share one header layout, so the scan is cached per header
+        return dict(_detect_availability_columns(tuple(headers)))
     
     def process_csv_file(self, csv_file_path: str) -> str:
         """Process the CSV file and return formatted output."""
@@ -161,143 +303,65 @@ class InShapePricingFormatter:
         availability_programs = {}  # Will be set after reading header
         
         try:
-            with open(csv_file_path, 'r', encoding='utf-8') as file:
-                csv_reader = csv.reader(file)
-                headers = next(csv_reader)  # Read header row
+            csv_reader = csv.reader(io.StringIO(_read_csv_text(csv_file_path)))
+            headers = next(csv_reader)  # Read header row
+            
+            # Detect which availability columns exist in the CSV
+            availability_programs = self.detect_availability_columns(headers)
+            
+            for row in csv_reader:
+                if len(row) < 15:  # Ensure minimum required columns
+                    continue
                 
-                # Detect which availability columns exist in the CSV
-                availability_programs = self.detect_availability_columns(headers)
+                # Strip every cell once here; nothing downstream strips again
+                row = [value.strip() for value in row]
                 
-                for row in csv_reader:
-                    if len(row) < 15:  # Ensure minimum required columns
-                        continue
-                    
-                    club_id = row[0].strip()
-                    club_name = row[1].strip()
-                    club_level = row[2].strip()
-                    local_name = row[3].strip()
-                    local_access = row[4].strip()
-                    elevate_offering = row[5].strip()
-                    fee_type = row[6].strip()
-                    
-                    if not club_name or club_name == "Club Name":
-                        continue
-                    
-                    # Store club basic info
-                    if club_id not in all_clubs:
-                        all_clubs[club_id] = {
-                            'name': club_name,
-                            'level': club_level,
-                            'local_name': local_name,
-                            'local_access': local_access,
-                            'elevate_offering': elevate_offering
-                        }
-                    
-                    # Store pricing data by fee type
-                    club_data_by_name[club_name].append(row)
+                # Club identity columns (level, access and elevate are read per club later)
+                club_id, club_name, _, local_name = row[:4]
+                
+                if not club_name or club_name == "Club Name":
+                    continue
+                
+                # Store club basic info from the club's first row as (name, local name)
+                if club_id not in all_clubs:
+                    all_clubs[club_id] = (club_name, local_name)
+                
+                # Store pricing data by fee type
+                club_data_by_name[club_name].append(row)
         
         except FileNotFoundError:
             return f"Error: File '{csv_file_path}' not found."
         except Exception as e:
             return f"Error processing file: {str(e)}"
         
-        # Generate formatted output
-        output_lines = []
+        # Index clubs by network (local name) once, sorted for output
+        network_index = defaultdict(list)
+        for club_name, local_name in all_clubs.values():
+            network_index[local_name].append(club_name)
+        for network_clubs in network_index.values():
+            network_clubs.sort()
         
-        for club_name in sorted(club_data_by_name.keys()):
-            rows = club_data_by_name[club_name]
+        # Generate formatted output, one section per club in name order
+        tasks = []
+        for club_name, rows in sorted(club_data_by_name.items()):
             if not rows:
                 continue
             
-            # Get club basic info from first row
-            first_row = rows[0]
-            club_id = first_row[0].strip()
-            club_level = first_row[2].strip()
-            local_name = first_row[3].strip()
-            local_access = first_row[4].strip()
-            elevate_offering = first_row[5].strip()
-            
-            output_lines.append(f"Club Name: {club_name}")
-            output_lines.append("")
-            output_lines.append("Pricing Details:")
-            
-            # Process each fee type
-            fee_data = {}
-            
-            for row in rows:
-                if len(row) < 15:
-                    continue
-                    
-                fee_type = row[6].strip()
-                
-                # Special handling for Member Type row (shows membership codes, not prices)
-                if fee_type == "Member Type":
-                    one_club = row[12].strip() if len(row) > 12 and row[12].strip() else "Not available"
-                    local_network = row[13].strip() if len(row) > 13 and row[13].strip() else "Not available"  
-                    lifestyle_plus = row[14].strip() if len(row) > 14 and row[14].strip() else "Not available"
-                else:
-                    # Get pricing for each membership type
-                    one_club = self.clean_price(row[12]) if len(row) > 12 else "Not available"
-                    local_network = self.clean_price(row[13]) if len(row) > 13 else "Not available"  
-                    lifestyle_plus = self.clean_price(row[14]) if len(row) > 14 else "Not available"
-                
-                fee_data[fee_type] = {
-                    "One Club": one_club,
-                    "Local Network": local_network,
-                    "Lifestyle Network Plus": lifestyle_plus
-                }
-            
-            # Get program availability from all rows for this club (only for programs that exist in CSV)
-            program_availability = self.get_program_availability(rows, availability_programs)
-            
-            # Output pricing details in the specified order
-            for fee_type in self.fee_types:
-                if fee_type in fee_data:
-                    data = fee_data[fee_type]
-                    output_lines.append(
-                        f"{fee_type}: One Club: {data['One Club']} | "
-                        f"Local Network: {data['Local Network']} | "
-                        f"Lifestyle Network Plus: {data['Lifestyle Network Plus']}"
-                    )
-            
-            output_lines.append("")
-            
-            # Add network information
-            network_clubs = self.get_network_clubs(local_access, local_name, club_name, all_clubs)
-            if local_name and local_name != "NA":
-                # Include the current club in the "Other Clubs" list
-                other_clubs_str = ", ".join(network_clubs) if network_clubs else ""
-                output_lines.append(f"Network Name: {local_name} (Other Clubs: {other_clubs_str})")
-            else:
-                output_lines.append("Network Name: Not available (Other Clubs: )")
-            
-            # Add elevate offering
-            if elevate_offering and elevate_offering.strip() not in ["", "NA", "Not available"]:
-                output_lines.append(f"Elevate Offering: {elevate_offering.strip()}")
-            else:
-                output_lines.append("Elevate Offering: Not available")
-            
-            output_lines.append("")
-            
-            # Add program availability (only if programs exist in CSV)
-            if availability_programs:
-                availability_parts = []
-                # Order: SILVER SNEAKERS, ASH - Standard, ASH - Premium, Optum - Classic Core, Optum - Premium Elite, OPTUM RENEW, Peer Fit
-                # Only include programs that were detected in the CSV
-                program_order = ["SILVER SNEAKERS", "ASH - Standard", "ASH - Premium", "Optum - Classic Core", "Optum - Premium Elite", "OPTUM RENEW", "Peer Fit"]
-                for program in program_order:
-                    if program in availability_programs:
-                        status = program_availability.get(program, "not available")
-                        availability_parts.append(f"{program}: {status}")
-                
-                if availability_parts:
-                    output_lines.append("Availability:")
-                    output_lines.append(" | ".join(availability_parts))
-            
-            output_lines.append("=" * 80)
-            output_lines.append("")
+            # Resolve the club's network here so each task carries only its own club list
+            local_name, local_access = rows[0][3:5]
+            network_clubs = self.get_network_clubs(local_access, local_name, club_name, network_index)
+            tasks.append((club_name, rows, availability_programs, network_clubs, self.fee_types))
+        
+        if len(tasks) >= _PARALLEL_MIN_CLUBS and (os.cpu_count() or 1) > 1:
+            # Formatting is pure-Python string work, so large files use worker processes;
+            # map() keeps the sections in order
+            with ProcessPoolExecutor() as executor:
+                sections = list(executor.map(_format_one_club, tasks, chunksize=16))
+        else:
+            sections = [_format_one_club(task) for task in tasks]
         
-        return "\n".join(output_lines)
+        # Lines were joined with newlines; drop the final one
+        return "".join(sections)[:-1]
     
     def save_output(self, formatted_data: str, output_file: str = "formatted_pricing.txt"):
         """Save the formatted output to a file."""
@@ -11,17 +11,34 @@ Date: 2025
 
 import os
 import re
+import sys
+from pathlib import Path
 from typing import List, Dict
 from datetime import datetime
 
 
+# Each club section starts on a line beginning with this heading
+_CLUB_HEADING = "Club Name: "
+
+# Separator line closing each club section (dropped from the club content)
+_SEPARATOR_LINE_RE = re.compile(r'\n={80}(?=\n|\Z)')
+
+
 class ClubFileSplitter:
     """
     Splits the formatted pricing data into separate files for each club.
     """
     
-    def __init__(self, output_directory: str = None):
+    # Invalid filename characters and spaces both become underscores
+    _FILENAME_TRANS = str.maketrans({c: '_' for c in '<>:"/\\|?* '})
+    
+    # Flags for writing club files with a single os.open/os.write/os.close each
+    _WRITE_FLAGS = os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, 'O_BINARY', 0)
+    
+    def __init__(self, output_directory: str = None, verbose: bool = True):
         self.club_sections = []
+        # List every club found and every saved file
+        self.verbose = verbose
         # Use provided output directory or generate with current date
         if output_directory is not None:
             self.output_directory = output_directory
@@ -36,11 +53,8 @@ class ClubFileSplitter:
         # Remove "Club Name: " prefix
         clean_name = club_name.replace("Club Name: ", "")
         
-        # Replace invalid filename characters
-        clean_name = re.sub(r'[<>:"/\\|?*]', '_', clean_name)
-        
-        # Replace spaces with underscores
-        clean_name = clean_name.replace(' ', '_')
+        # Replace invalid filename characters and spaces with underscores in one pass
+        clean_name = clean_name.translate(self._FILENAME_TRANS)
         
         # Remove any trailing dots or spaces
         clean_name = clean_name.strip('. ')
@@ -51,42 +65,8 @@ class ClubFileSplitter:
         """
         Split the formatted file into individual club sections.
         """
-        club_sections = []
-        current_club = None
-        current_content = []
-        
         try:
-            with open(file_path, 'r', encoding='utf-8') as file:
-                lines = file.readlines()
-            
-            for line in lines:
-                line = line.rstrip('\n')
-                
-                # Check if this is a new club section
-                if line.startswith("Club Name: "):
-                    # Save previous club if exists
-                    if current_club and current_content:
-                        club_sections.append({
-                            'name': current_club,
-                            'content': '\n'.join(current_content)
-                        })
-                    
-                    # Start new club
-                    current_club = line
-                    current_content = [line]
-                
-                # Add line to current club content (skip the separator line)
-                elif current_club:
-                    # Skip the separator line at the end of each club section
-                    if line != "================================================================================":
-                        current_content.append(line)
-            
-            # Don't forget the last club
-            if current_club and current_content:
-                club_sections.append({
-                    'name': current_club,
-                    'content': '\n'.join(current_content)
-                })
+            return self.split_club_text(Path(file_path).read_text(encoding='utf-8'))
         
         except FileNotFoundError:
             print(f"Error: File '{file_path}' not found.")
@@ -94,8 +74,29 @@ class ClubFileSplitter:
         except Exception as e:
             print(f"Error reading file: {e}")
             return []
-        
-        return club_sections
+    
+    def split_club_text(self, text: str) -> List[Dict[str, str]]:
+        """
+        Split formatted text into individual club sections with bulk string splits.
+        A section runs from a "Club Name: " line up to the next one; text before the
+        first club is ignored and separator lines are dropped.
+        """
+        parts = text.split("\n" + _CLUB_HEADING)
+        chunks = [_CLUB_HEADING + part for part in parts[1:]]
+        if parts[0].startswith(_CLUB_HEADING):
+            chunks.insert(0, parts[0])
+        
+        # The file's final newline ends the last line rather than starting an empty one
+        if chunks and chunks[-1].endswith("\n"):
+            chunks[-1] = chunks[-1][:-1]
+        
+        return [
+            {
+                'name': chunk.partition("\n")[0],
+                'content': _SEPARATOR_LINE_RE.sub("", chunk)
+            }
+            for chunk in chunks
+        ]
     
     def create_output_directory(self):
         """
@@ -115,6 +116,8 @@ class ClubFileSplitter:
         
         self.create_output_directory()
         saved_count = 0
+        # Per-file messages are written out together after the loop
+        messages = []
         
         for club in club_sections:
             club_name = club['name']
@@ -125,21 +128,41 @@ class ClubFileSplitter:
             file_path = os.path.join(self.output_directory, f"{filename}.txt")
             
             try:
-                with open(file_path, 'w', encoding='utf-8') as file:
-                    file.write(content)
+                # Same bytes as a text-mode write: newlines become the platform line separator
+                if os.linesep != '\n':
+                    content = content.replace('\n', os.linesep)
+                data = memoryview(content.encode('utf-8'))
+                fd = os.open(file_path, self._WRITE_FLAGS, 0o666)
+                try:
+                    while data:
+                        data = data[os.write(fd, data):]
+                finally:
+                    os.close(fd)
                 
-                print(f"Saved: {file_path}")
+                if self.verbose:
+                    messages.append(f"Saved: {file_path}")
                 saved_count += 1
             
             except Exception as e:
-                print(f"Error saving {file_path}: {e}")
+                messages.append(f"Error saving {file_path}: {e}")
         
+        if messages:
+            sys.stdout.write("\n".join(messages) + "\n")
         return saved_count
     
-    def process_file(self, input_file: str = None):
+    def club_texts(self, club_sections: List[Dict[str, str]]) -> Dict[str, str]:
+        """
+        Map each club file name (as save_club_files would write it) to its content,
+        for passing club sections on in memory instead of through files.
+        """
+        return {f"{self.clean_filename(club['name'])}.txt": club['content'] for club in club_sections}
+    
+    def process_file(self, input_file: str = None, save: bool = True) -> List[Dict[str, str]]:
         """
         Main method to process the formatted file and create separate club files.
         If input_file is not provided, uses current date to construct filename.
+        If save is False, the club sections are only returned and no files are written.
+        Returns the club sections.
         """
         if input_file is None:
             # Generate filename with current date
@@ -150,19 +173,41 @@ class ClubFileSplitter:
         print("=" * 50)
         
         # Split the file into club sections
-        club_sections = self.split_club_sections(input_file)
+        return self._process_sections(self.split_club_sections(input_file), save)
+    
+    def process_text(self, text: str, save: bool = True) -> List[Dict[str, str]]:
+        """
+        Same as process_file, for formatted text already in memory (e.g. straight
+        from the formatter) instead of read back from a file.
+        Returns the club sections.
+        """
+        print("Processing formatted text")
+        print("=" * 50)
         
+        return self._process_sections(self.split_club_text(text), save)
+    
+    def _process_sections(self, club_sections: List[Dict[str, str]], save: bool) -> List[Dict[str, str]]:
+        """
+        List the split club sections and, if save is set, write them to club files.
+        """
         if not club_sections:
             print("No club sections found in the file.")
-            return
-        
-        print(f"Found {len(club_sections)} clubs:")
-        for i, club in enumerate(club_sections, 1):
-            club_name = club['name'].replace("Club Name: ", "")
-            print(f"{i:2d}. {club_name}")
+            return club_sections
+        
+        if self.verbose:
+            print(f"Found {len(club_sections)} clubs:")
+            sys.stdout.write("".join(
+                f"{i:2d}. {club['name'].replace('Club Name: ', '')}\n"
+                for i, club in enumerate(club_sections, 1)
+            ))
+        else:
+            print(f"Found {len(club_sections)} clubs.")
         
         print("\n" + "=" * 50)
         
+        if not save:
+            return club_sections
+        
         # Save each club to a separate file
         saved_count = self.save_club_files(club_sections)
         
@@ -177,6 +222,8 @@ class ClubFileSplitter:
             
             if len(club_sections) > 5:
                 print(f"  ... and {len(club_sections) - 5} more files")
+        
+        return club_sections
 
 
 def main():
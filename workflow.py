@@ -7,16 +7,21 @@ Runs the full pipeline in one go:
   2. split_club_files: formatted TXT → one TXT per club in club_files_{date}/
   3. dynamic_pricing: club TXTs + ISF markdown source → updated ISF_locations_{date}/
 
+Each step hands its output to the next in memory. The formatted TXT and club_files_{date}/
+are only written with --keep-intermediate (or when the step that would consume them is skipped).
+
 Usage:
   python workflow.py
   python workflow.py --csv "ISS Pricing 01292026.csv" --isf-dir ISF_locations_22-01-26
   python workflow.py --date 31-01-26
+  python workflow.py --keep-intermediate
 """
 
 import argparse
 import sys
 from pathlib import Path
 from datetime import datetime
+from typing import Dict, Optional
 
 # Project root (where this script lives)
 PROJECT_DIR = Path(__file__).resolve().parent
@@ -60,11 +65,18 @@ def parse_args():
         action="store_true",
         help="Skip step 3 (do not update ISF markdown)",
     )
+    parser.add_argument(
+        "--keep-intermediate",
+        action="store_true",
+        help="Also write the formatted TXT and the per-club TXTs to club_files_{date}/ "
+             "(needed for later --skip-format / --skip-split runs)",
+    )
     return parser.parse_args()
 
 
-def step1_format(csv_path: Path, date_str: str) -> Path:
-    """Run inshape_pricing_formatter: CSV → inshape_pricing_formatted_{date}.txt"""
+def step1_format(csv_path: Path, date_str: str, save_file: bool = True) -> str:
+    """Run inshape_pricing_formatter: CSV → inshape_pricing_formatted_{date}.txt (written only if save_file).
+    Returns the formatted text."""
     from inshape_pricing_formatter import InShapePricingFormatter
 
     formatter = InShapePricingFormatter()
@@ -72,7 +84,7 @@ def step1_format(csv_path: Path, date_str: str) -> Path:
 
     print("[Step 1] InShape pricing formatter: CSV → formatted TXT")
     print(f"  CSV:    {csv_path}")
-    print(f"  Output: {output_file}")
+    print(f"  Output: {output_file if save_file else '(in memory)'}")
 
     if not csv_path.exists():
         print(f"  Error: CSV not found: {csv_path}")
@@ -83,44 +95,57 @@ def step1_format(csv_path: Path, date_str: str) -> Path:
         print(f"  Error: {formatted}")
         sys.exit(1)
 
-    formatter.save_output(formatted, str(output_file))
-    print(f"  Done. Wrote {output_file}\n")
-    return output_file
+    if save_file:
+        formatter.save_output(formatted, str(output_file))
+        print(f"  Done. Wrote {output_file}\n")
+    else:
+        print("  Done. Formatted text passed on in memory\n")
+    return formatted
 
 
-def step2_split(formatted_txt: Path, date_str: str) -> Path:
-    """Run split_club_files: formatted TXT → club_files_{date}/"""
+def step2_split(formatted_txt: Path, date_str: str, save_files: bool = True,
+                formatted_text: Optional[str] = None) -> Dict[str, str]:
+    """Run split_club_files: formatted TXT → club_files_{date}/ (written only if save_files).
+    formatted_text, if given, replaces reading formatted_txt.
+    Returns the club TXT contents keyed by file name."""
     from split_club_files import ClubFileSplitter
 
     output_dir = PROJECT_DIR / f"club_files_{date_str}"
-    splitter = ClubFileSplitter(output_directory=str(output_dir))
+    splitter = ClubFileSplitter(output_directory=str(output_dir), verbose=False)
 
     print("[Step 2] Split club files: one TXT per club")
-    print(f"  Input:  {formatted_txt}")
-    print(f"  Output: {output_dir}")
+    print(f"  Input:  {formatted_txt if formatted_text is None else '(in memory)'}")
+    print(f"  Output: {output_dir if save_files else '(in memory)'}")
 
-    if not formatted_txt.exists():
-        print(f"  Error: Formatted file not found: {formatted_txt}")
-        sys.exit(1)
-
-    splitter.process_file(str(formatted_txt))
-    print(f"  Done. Club files in {output_dir}\n")
-    return output_dir
+    if formatted_text is not None:
+        club_sections = splitter.process_text(formatted_text, save=save_files)
+    else:
+        if not formatted_txt.exists():
+            print(f"  Error: Formatted file not found: {formatted_txt}")
+            sys.exit(1)
+        club_sections = splitter.process_file(str(formatted_txt), save=save_files)
+    if save_files:
+        print(f"  Done. Club files in {output_dir}\n")
+    else:
+        print(f"  Done. {len(club_sections)} club sections passed on in memory\n")
+    return splitter.club_texts(club_sections)
 
 
-def step3_update(txt_dir: Path, md_dir: Path, date_str: str) -> Path:
-    """Run dynamic_pricing: club TXTs + ISF MD → ISF_locations_{date}/"""
+def step3_update(txt_dir: Path, md_dir: Path, date_str: str,
+                 club_texts: Optional[Dict[str, str]] = None) -> Path:
+    """Run dynamic_pricing: club TXTs + ISF MD → ISF_locations_{date}/
+    club_texts, if given, replaces reading the club TXTs from txt_dir."""
     from dynamic_pricing import run as dynamic_pricing_run
 
     updated_dir = PROJECT_DIR / f"ISF_locations_{date_str}"
     csv_file = PROJECT_DIR / "NFC_file.csv"
 
     print("[Step 3] Update ISF markdown with pricing")
-    print(f"  Club TXTs: {txt_dir}")
+    print(f"  Club TXTs: {txt_dir if club_texts is None else '(in memory)'}")
     print(f"  ISF source: {md_dir}")
     print(f"  Output:     {updated_dir}")
 
-    if not txt_dir.exists():
+    if club_texts is None and not txt_dir.exists():
         print(f"  Error: Club files dir not found: {txt_dir}")
         sys.exit(1)
     if not md_dir.exists():
@@ -133,6 +158,7 @@ def step3_update(txt_dir: Path, md_dir: Path, date_str: str) -> Path:
         updated_dir=updated_dir,
         csv_file=csv_file if csv_file.exists() else None,
         project_dir=PROJECT_DIR,
+        club_texts=club_texts,
     )
     print(f"  Done. Updated ISF files in {updated_dir}\n")
     return updated_dir
@@ -152,8 +178,12 @@ def main():
     formatted_txt = PROJECT_DIR / f"inshape_pricing_formatted_{date_str}.txt"
     club_dir = PROJECT_DIR / f"club_files_{date_str}"
 
+    formatted_text = None
     if not args.skip_format:
-        step1_format(args.csv, date_str)
+        # The formatted TXT is only needed on disk if asked for or if step 2 will not consume it
+        formatted_text = step1_format(
+            args.csv, date_str, save_file=args.keep_intermediate or args.skip_split
+        )
     else:
         print("[Step 1] Skipped (--skip-format)")
         if not formatted_txt.exists() and not args.skip_split:
@@ -161,8 +191,13 @@ def main():
         else:
             print()
 
+    club_texts = None
     if not args.skip_split:
-        step2_split(formatted_txt, date_str)
+        # Club files are only needed on disk if asked for or if step 3 will not consume them
+        club_texts = step2_split(
+            formatted_txt, date_str, save_files=args.keep_intermediate or args.skip_update,
+            formatted_text=formatted_text,
+        )
     else:
         print("[Step 2] Skipped (--skip-split)")
         if not club_dir.exists() and not args.skip_update:
@@ -171,7 +206,7 @@ def main():
             print()
 
     if not args.skip_update:
-        step3_update(club_dir, args.isf_dir, date_str)
+        step3_update(club_dir, args.isf_dir, date_str, club_texts=club_texts)
     else:
         print("[Step 3] Skipped (--skip-update)\n")
 